@@ -9,65 +9,162 @@ This script reads templates from content/notebooks/ and generates
 .ipynb files in the notebooks/ directory.
 """
 
-import json
+from __future__ import annotations
+
+import argparse
+import functools
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+
+from dataclasses import asdict, dataclass, field
+
+# Fast JSON backend cascade: orjson (Rust, SIMD string scanning) where
+# it installed, ujson as the middle ground, stdlib json everywhere else
+# (e.g. Windows CI without a Rust toolchain). _dumps always returns
+# bytes; the pure-Python backends get a default= hook so the dataclass
+# cells serialize the same way orjson handles them natively.
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    try:
+        import ujson
+
+        def _dumps(obj) -> bytes:
+            # escape_forward_slashes off: ujson writes \/ by default,
+            # which would dirty the committed artifacts relative to the
+            # orjson/stdlib output.
+            return ujson.dumps(obj, ensure_ascii=False,
+                               escape_forward_slashes=False,
+                               default=asdict).encode('utf-8')
+    except ImportError:
+        import json
+
+        def _dumps(obj) -> bytes:
+            # Compact separators and raw UTF-8 match the orjson output:
+            # no inter-key whitespace, emoji not \uXXXX-escaped.
+            return json.dumps(obj, separators=(',', ':'), ensure_ascii=False,
+                              default=asdict).encode('utf-8')
+
+# Optional: --msgpack emits binary artifacts for non-Jupyter consumers.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 # Notebook format version
 NBFORMAT_VERSION = 4
 NBFORMAT_MINOR = 0
 
-def create_markdown_cell(source: str) -> Dict[str, Any]:
-    """Create a markdown cell."""
-    return {
-        "cell_type": "markdown",
-        "metadata": {},
-        "source": source.split('\n')
-    }
-
-def create_code_cell(source: str, hidden: bool = False) -> Dict[str, Any]:
-    """Create a code cell."""
-    cell = {
-        "cell_type": "code",
-        "execution_count": None,
-        "metadata": {},
-        "outputs": [],
-        "source": source.split('\n')
+# Shared metadata skeleton: identical for every notebook, so build it once
+# at import time and reference it from every create_notebook call.
+# Shared between notebooks — never mutate (orjson can't serialize a
+# MappingProxyType, so a plain dict it is).
+_NB_METADATA = {
+    "kernelspec": {
+        "display_name": "Python 3",
+        "language": "python",
+        "name": "python3"
+    },
+    "language_info": {
+        "name": "python",
+        "version": "3.10.0"
+    },
+    "colab": {
+        "provenance": [],
+        "toc_visible": True,
+        "authorship_tag": "QuantLearn"
     }
-    if hidden:
-        cell["metadata"]["cellView"] = "form"
-    return cell
+}
 
-def create_notebook(cells: List[Dict[str, Any]], title: str) -> Dict[str, Any]:
+# Cell metadata only ever takes one of two shapes, and no cell is
+# mutated after construction, so every cell shares the same instances
+# instead of allocating a fresh dict + list apiece. The empty tuple
+# serializes as [] just like an empty list.
+_EMPTY_META: dict = {}
+_FORM_META: dict = {"cellView": "form"}
+_PARAMS_META: dict = {"tags": ["parameters"]}
+_NO_OUTPUTS: tuple = ()
+
+# Cells are __slots__ dataclasses rather than dicts: no per-instance
+# __dict__, so thousands of cells cost far less memory, and orjson
+# serializes dataclasses natively into the same nbformat JSON.
+@dataclass(slots=True)
+class MarkdownCell:
+    """A markdown cell in nbformat v4 layout."""
+    cell_type: str = "markdown"
+    metadata: dict = field(default_factory=dict)
+    source: str = ""
+
+@dataclass(slots=True)
+class CodeCell:
+    """A code cell in nbformat v4 layout."""
+    cell_type: str = "code"
+    execution_count: None = None
+    metadata: dict = field(default_factory=dict)
+    outputs: tuple = ()
+    source: str = ""
+
+Cell = MarkdownCell | CodeCell
+
+# nbformat v4 accepts source as either a list of lines or a single
+# string. A single string encodes in one UTF-8 scan instead of one per
+# line, so keep it whole.
+def create_markdown_cell(source: str) -> MarkdownCell:
+    """Create a markdown cell."""
+    return MarkdownCell(metadata=_EMPTY_META, source=source)
+
+def create_code_cell(source: str, hidden: bool = False,
+                     params: bool = False) -> CodeCell:
+    """Create a code cell; params tags it for papermill injection."""
+    if params:
+        metadata = _PARAMS_META
+    else:
+        metadata = _FORM_META if hidden else _EMPTY_META
+    return CodeCell(metadata=metadata, outputs=_NO_OUTPUTS, source=source)
+
+# Lessons repeat identical boilerplate cells (setup imports, solution
+# scaffolding), so the serialized bytes of each cell are memoized by
+# source text: a duplicate cell costs a dict lookup instead of another
+# dataclass build + JSON encode.
+@functools.lru_cache(maxsize=1024)
+def _encoded_markdown_cell(source: str) -> bytes:
+    return _dumps(create_markdown_cell(source))
+
+@functools.lru_cache(maxsize=1024)
+def _encoded_code_cell(source: str, hidden: bool = False,
+                       params: bool = False) -> bytes:
+    return _dumps(create_code_cell(source, hidden, params))
+
+def _cell_fragment(cell: Cell) -> bytes:
+    """Serialized bytes for one cell, via the per-source cache."""
+    if isinstance(cell, CodeCell):
+        return _encoded_code_cell(cell.source, cell.metadata is _FORM_META,
+                                  cell.metadata is _PARAMS_META)
+    return _encoded_markdown_cell(cell.source)
+
+def create_notebook(cells: list[Cell], title: str) -> dict:
     """Create a complete notebook structure."""
     return {
         "nbformat": NBFORMAT_VERSION,
         "nbformat_minor": NBFORMAT_MINOR,
-        "metadata": {
-            "kernelspec": {
-                "display_name": "Python 3",
-                "language": "python",
-                "name": "python3"
-            },
-            "language_info": {
-                "name": "python",
-                "version": "3.10.0"
-            },
-            "colab": {
-                "provenance": [],
-                "toc_visible": True,
-                "authorship_tag": "QuantLearn"
-            }
-        },
+        "metadata": _NB_METADATA,
         "cells": cells
     }
 
 # ============================================================================
 # NOTEBOOK TEMPLATES BY MODULE
 # ============================================================================
+#
+# Builders are memoized: when the module is imported by a pipeline that
+# regenerates repeatedly, each lesson's cell list is assembled once and
+# the cached structure (which nothing mutates) is reused.
 
-def create_basics_returns_notebook() -> Dict[str, Any]:
+@functools.lru_cache(maxsize=None)
+def create_basics_returns_notebook() -> dict:
     """Basics Module: Introduction to Returns"""
     cells = [
         create_markdown_cell("""# Introduction to Returns
@@ -219,7 +316,8 @@ You've learned:
     return create_notebook(cells, "Introduction to Returns")
 
 
-def create_basics_statistics_notebook() -> Dict[str, Any]:
+@functools.lru_cache(maxsize=None)
+def create_basics_statistics_notebook() -> dict:
     """Basics Module: Descriptive Statistics"""
     cells = [
         create_markdown_cell("""# Descriptive Statistics for Returns
@@ -254,9 +352,20 @@ These are the first two "moments" of a distribution."""),
 n_days = 252  # One trading year
 daily_returns = np.random.normal(0.0005, 0.02, n_days)  # ~12.6% annual return, 32% vol
 
+def fast_moments(x):
+    \"\"\"All four moments from one centered array (no re-scanning per stat).\"\"\"
+    n = len(x)
+    m = x.mean()
+    d = x - m
+    d2 = d * d
+    m2 = d2.mean()
+    std = np.sqrt(m2 * n / (n - 1))        # sample std (ddof=1)
+    skew = (d2 * d).mean() / m2 ** 1.5
+    kurt = (d2 * d2).mean() / m2 ** 2 - 3  # excess kurtosis (normal = 0)
+    return m, std, skew, kurt
+
 # Calculate statistics
-mean_return = np.mean(daily_returns)
-volatility = np.std(daily_returns, ddof=1)  # ddof=1 for sample std
+mean_return, volatility, skewness, kurtosis = fast_moments(daily_returns)
 
 # Annualize
 annual_return = mean_return * 252
@@ -279,10 +388,8 @@ print(f"Annualized volatility: {annual_vol*100:.2f}%")"""),
 - Normal distribution has kurtosis = 3
 - Stock returns typically have high kurtosis"""),
 
-        create_code_cell("""# Calculate higher moments
-skewness = stats.skew(daily_returns)
-kurtosis = stats.kurtosis(daily_returns)  # Excess kurtosis (normal = 0)
-
+        create_code_cell("""# Higher moments came from the same fast_moments pass as mean/vol —
+# scipy's stats.skew and stats.kurtosis would each re-center the data.
 print(f"Skewness: {skewness:.3f}")
 print(f"Excess Kurtosis: {kurtosis:.3f}")
 
@@ -335,10 +442,7 @@ returns = np.array([
     0.01, -0.01, 0.025, -0.015, 0.01, -0.05
 ])
 
-mean = np.mean(returns)
-vol = np.std(returns, ddof=1)
-skew = stats.skew(returns)
-kurt = stats.kurtosis(returns)
+mean, vol, skew, kurt = fast_moments(returns)
 
 print(f"Mean: {mean*100:.3f}%")
 print(f"Volatility: {vol*100:.2f}%")
@@ -366,7 +470,11 @@ print("- This is typical of real stock returns!")""", hidden=True),
     return create_notebook(cells, "Descriptive Statistics")
 
 
-def create_backtesting_fundamentals_notebook() -> Dict[str, Any]:
+@functools.lru_cache(maxsize=None)
+def create_backtesting_fundamentals_notebook(n_days: int = 500,
+                                             seed: int = 42,
+                                             fast: int = 20,
+                                             slow: int = 50) -> dict:
     """Backtesting Module: Fundamentals"""
     cells = [
         create_markdown_cell("""# Backtesting Fundamentals
@@ -377,12 +485,47 @@ def create_backtesting_fundamentals_notebook() -> Dict[str, Any]:
 
 Build your first backtest from scratch. Learn the core components: signals, positions, and performance measurement."""),
 
+        create_code_cell(f"""# Parameters (override with papermill, e.g. `-p n_days 10000`)
+n_days = {n_days}
+seed = {seed}
+fast_period = {fast}
+slow_period = {slow}""", params=True),
+
         create_code_cell("""#@title 📦 Setup
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-np.random.seed(42)
+# numba is optional (pre-installed on Colab): with it, the drawdown
+# kernel below is JIT-compiled; without it it runs as plain Python.
+try:
+    from numba import njit
+except ImportError:
+    def njit(**kwargs):
+        return lambda func: func
+
+@njit(cache=True)
+def max_drawdown_streaming(r):
+    \"\"\"Max drawdown and total return in one pass over the returns.
+
+    Tracks the wealth accumulator and its running peak in scalars, so
+    no cumulative/running-max/drawdown temporaries are allocated.
+    \"\"\"
+    acc = 1.0
+    peak = 1.0
+    dd = 0.0
+    for i in range(len(r)):
+        acc *= 1.0 + r[i]
+        if acc > peak:
+            peak = acc
+        d = acc / peak - 1.0
+        if d < dd:
+            dd = d
+    return dd, acc - 1.0
+
+max_drawdown_streaming(np.zeros(2))  # warm the JIT cache
+
+np.random.seed(seed)
 plt.style.use('seaborn-v0_8-whitegrid')
 print("✓ Setup complete!")""", hidden=True),
 
@@ -399,7 +542,6 @@ Every backtest has these components:
 Let's build each piece."""),
 
         create_code_cell("""# 1. Generate sample price data
-n_days = 500
 dates = pd.date_range('2022-01-01', periods=n_days, freq='B')
 returns = np.random.normal(0.0003, 0.015, n_days)
 prices = 100 * np.cumprod(1 + returns)
@@ -426,9 +568,6 @@ Let's implement a simple **moving average crossover** strategy:
 - Sell (signal = -1) when fast MA < slow MA"""),
 
         create_code_cell("""# Calculate moving averages
-fast_period = 20
-slow_period = 50
-
 df['MA_Fast'] = df['Price'].rolling(fast_period).mean()
 df['MA_Slow'] = df['Price'].rolling(slow_period).mean()
 
@@ -490,26 +629,27 @@ plt.show()"""),
 
         create_code_cell("""def calculate_metrics(returns, periods_per_year=252):
     \"\"\"Calculate key performance metrics.\"\"\"
-    # Remove NaN
-    returns = returns.dropna()
+    # Remove NaN and drop to the raw array
+    r = returns.dropna().to_numpy()
+    n = r.size
+
+    # One reduction pass for the moments, one streaming pass for the
+    # wealth path; every metric below is derived from these instead of
+    # re-scanning the returns per statistic.
+    s = r.sum()
+    s2 = (r * r).sum()
+    max_drawdown, total_return = max_drawdown_streaming(r)
 
     # Annualized return
-    total_return = (1 + returns).prod() - 1
-    n_years = len(returns) / periods_per_year
+    n_years = n / periods_per_year
     annual_return = (1 + total_return) ** (1/n_years) - 1
 
-    # Annualized volatility
-    annual_vol = returns.std() * np.sqrt(periods_per_year)
+    # Annualized volatility (sample variance from sum / sum of squares)
+    annual_vol = np.sqrt((s2 - s * s / n) / (n - 1) * periods_per_year)
 
     # Sharpe ratio (assuming 0% risk-free rate)
     sharpe = annual_return / annual_vol if annual_vol > 0 else 0
 
-    # Maximum drawdown
-    cumulative = (1 + returns).cumprod()
-    running_max = cumulative.cummax()
-    drawdown = (cumulative - running_max) / running_max
-    max_drawdown = drawdown.min()
-
     return {
         'Annual Return': f"{annual_return*100:.2f}%",
         'Annual Volatility': f"{annual_vol*100:.2f}%",
@@ -552,9 +692,15 @@ df['Mom_Return'] = None  # Your code here
 
         create_code_cell("""#@title 💡 Solution
 
-# Calculate 10-day momentum
+# Calculate 10-day momentum: rolling sum as a cumsum difference
+# (c[t] - c[t-w] gives the w-bar window sum in one vectorized pass)
 lookback = 10
-df['Momentum'] = df['Return'].rolling(lookback).sum()
+ret = df['Return'].to_numpy()
+c = np.cumsum(ret)
+mom = np.empty_like(ret)
+mom[:lookback - 1] = np.nan
+mom[lookback - 1:] = c[lookback - 1:] - np.concatenate([[0.0], c[:-lookback]])
+df['Momentum'] = mom
 
 # Generate signal
 df['Mom_Signal'] = np.where(df['Momentum'] > 0, 1, -1)
@@ -568,8 +714,11 @@ print("=== Momentum Strategy ===")
 for k, v in calculate_metrics(df['Mom_Return'].dropna()).items():
     print(f"{k}: {v}")
 
-# Plot
+# Plot (rebuild all three curves on df_mom's common rows; the earlier
+# cumulative columns live on the df_clean copy, not on df)
 df_mom = df.dropna()
+df_mom['Cumulative_Market'] = (1 + df_mom['Return']).cumprod()
+df_mom['Cumulative_Strategy'] = (1 + df_mom['Strategy_Return']).cumprod()
 df_mom['Cumulative_Momentum'] = (1 + df_mom['Mom_Return']).cumprod()
 
 plt.figure(figsize=(12, 5))
@@ -595,7 +744,9 @@ You've built a complete backtest with:
     return create_notebook(cells, "Backtesting Fundamentals")
 
 
-def create_strategies_trend_following_notebook() -> Dict[str, Any]:
+@functools.lru_cache(maxsize=None)
+def create_strategies_trend_following_notebook(n_days: int = 500,
+                                               seed: int = 42) -> dict:
     """Strategies Module: Trend Following"""
     cells = [
         create_markdown_cell("""# Trend Following Strategies
@@ -606,32 +757,94 @@ def create_strategies_trend_following_notebook() -> Dict[str, Any]:
 
 Learn to build and backtest trend-following strategies using moving averages, breakouts, and momentum signals."""),
 
+        create_code_cell(f"""# Parameters (override with papermill, e.g. `-p n_days 10000`)
+n_days = {n_days}
+seed = {seed}""", params=True),
+
         create_code_cell("""#@title 📦 Setup
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-np.random.seed(42)
+# numba is optional (pre-installed on Colab): with it, the indicator
+# kernels below are JIT-compiled; without it they run as plain Python.
+try:
+    from numba import njit
+except ImportError:
+    def njit(**kwargs):
+        return lambda func: func
+
+@njit(cache=True)
+def hold_signal(sig):
+    \"\"\"Carry the last non-zero signal forward (hold the position).
+
+    Single pass over an int8 array; replaces the
+    replace(0, nan).ffill().fillna(0) pandas chain.
+    \"\"\"
+    out = np.empty_like(sig)
+    state = np.int8(0)
+    for i in range(len(sig)):
+        if sig[i] != 0:
+            state = sig[i]
+        out[i] = state
+    return out
+
+@njit(cache=True)
+def signal_to_returns(sig, ret):
+    \"\"\"Fuse hold-fill, the one-bar execution delay, and P&L into one pass.
+
+    Today's position is the last non-zero signal seen through yesterday
+    (no look-ahead), so the shift(1) and multiply intermediates are
+    never materialized.
+    \"\"\"
+    n = len(sig)
+    pos = np.empty(n)
+    out = np.empty(n)
+    state = 0.0
+    for i in range(n):
+        pos[i] = state
+        out[i] = state * ret[i]
+        if sig[i] != 0:
+            state = sig[i]
+    return pos, out
+
+@njit(cache=True)
+def cum_wealth(r):
+    \"\"\"Growth of $1: fused (1 + r) cumprod, no intermediate array.\"\"\"
+    n = len(r)
+    out = np.empty(n)
+    acc = 1.0
+    for i in range(n):
+        acc *= 1.0 + r[i]
+        out[i] = acc
+    return out
+
+# Warm the JIT cache on tiny inputs so the first strategy cell does not
+# pay the compile cost; with cache=True later sessions reload from disk.
+_tiny_sig = np.zeros(2, dtype=np.int8)
+_tiny_ret = np.zeros(2)
+hold_signal(_tiny_sig)
+signal_to_returns(_tiny_sig, _tiny_ret)
+cum_wealth(_tiny_ret)
+
+np.random.seed(seed)
 plt.style.use('seaborn-v0_8-whitegrid')
 
-# Generate trending price data with regimes
-def generate_trending_data(n_days=500):
+# Generate trending price data with regimes.
+# Fully vectorized: draw every switch event and noise sample up front,
+# then cumprod over the sign flips carries the regime forward — no
+# per-day Python loop.
+def generate_trending_data(n_days):
     dates = pd.date_range('2022-01-01', periods=n_days, freq='B')
 
-    # Create regime-switching returns
-    returns = []
-    regime = 1  # Start bullish
-    for i in range(n_days):
-        if np.random.random() < 0.02:  # 2% chance of regime switch
-            regime *= -1
-        drift = 0.001 * regime  # Positive or negative drift
-        ret = np.random.normal(drift, 0.015)
-        returns.append(ret)
-
-    prices = 100 * np.cumprod(1 + np.array(returns))
+    switches = np.random.random(n_days) < 0.02  # 2% chance of regime switch
+    regime = np.cumprod(np.where(switches, -1, 1))  # +1 bullish, -1 bearish
+    returns = 0.001 * regime + np.random.normal(0, 0.015, n_days)
+
+    prices = 100 * np.cumprod(1 + returns)
     return pd.DataFrame({'Date': dates, 'Price': prices, 'Return': returns}).set_index('Date')
 
-df = generate_trending_data()
+df = generate_trending_data(n_days)
 print("✓ Setup complete!")
 print(f"Generated {len(df)} days of price data")""", hidden=True),
 
@@ -650,9 +863,9 @@ df['MA_Fast'] = df['Price'].rolling(fast_period).mean()
 df['MA_Slow'] = df['Price'].rolling(slow_period).mean()
 
 # Signal: 1 = long, -1 = short
-df['MA_Signal'] = np.where(df['MA_Fast'] > df['MA_Slow'], 1, -1)
-df['MA_Position'] = df['MA_Signal'].shift(1)
-df['MA_Return'] = df['MA_Position'] * df['Return']
+df['MA_Signal'] = np.where(df['MA_Fast'] > df['MA_Slow'], 1, -1).astype(np.int8)
+df['MA_Position'], df['MA_Return'] = signal_to_returns(
+    df['MA_Signal'].to_numpy(np.int8), df['Return'].to_numpy())
 
 # Visualize
 fig, axes = plt.subplots(2, 1, figsize=(14, 8), sharex=True)
@@ -664,10 +877,10 @@ axes[0].set_ylabel('Price')
 axes[0].legend()
 axes[0].set_title('Moving Average Crossover Strategy')
 
-# Cumulative returns
+# Cumulative returns (re-wrapped as Series so the date axis survives)
 df_clean = df.dropna()
-cum_market = (1 + df_clean['Return']).cumprod()
-cum_strategy = (1 + df_clean['MA_Return']).cumprod()
+cum_market = pd.Series(cum_wealth(df_clean['Return'].to_numpy()), df_clean.index)
+cum_strategy = pd.Series(cum_wealth(df_clean['MA_Return'].to_numpy()), df_clean.index)
 
 axes[1].plot(cum_market, label='Buy & Hold', alpha=0.7)
 axes[1].plot(cum_strategy, label='MA Crossover', linewidth=2)
@@ -686,18 +899,55 @@ Trade when price breaks above/below recent high/low:
         create_code_cell("""# Breakout Strategy (Donchian Channel)
 lookback = 20
 
-df['High_N'] = df['Price'].rolling(lookback).max()
-df['Low_N'] = df['Price'].rolling(lookback).min()
-
-# Signal: breakout above high = long, below low = short
-df['Breakout_Signal'] = 0
-df.loc[df['Price'] >= df['High_N'].shift(1), 'Breakout_Signal'] = 1
-df.loc[df['Price'] <= df['Low_N'].shift(1), 'Breakout_Signal'] = -1
-
-# Forward fill signal (hold position)
-df['Breakout_Signal'] = df['Breakout_Signal'].replace(0, np.nan).ffill().fillna(0)
-df['Breakout_Position'] = df['Breakout_Signal'].shift(1)
-df['Breakout_Return'] = df['Breakout_Position'] * df['Return']
+@njit(cache=True)
+def rolling_minmax(x, w):
+    \"\"\"Rolling max and min in one O(n) pass using monotonic deques.
+
+    Each deque holds candidate indices: values are popped from the back
+    when dominated by the newcomer and from the front when they fall out
+    of the window, so every index enters and leaves at most once.
+    \"\"\"
+    n = len(x)
+    hi = np.full(n, np.nan)
+    lo = np.full(n, np.nan)
+    dq_max = np.empty(n, np.int64)
+    dq_min = np.empty(n, np.int64)
+    max_head = max_tail = 0
+    min_head = min_tail = 0
+    for i in range(n):
+        while max_tail > max_head and x[dq_max[max_tail - 1]] <= x[i]:
+            max_tail -= 1
+        dq_max[max_tail] = i
+        max_tail += 1
+        if dq_max[max_head] <= i - w:
+            max_head += 1
+        while min_tail > min_head and x[dq_min[min_tail - 1]] >= x[i]:
+            min_tail -= 1
+        dq_min[min_tail] = i
+        min_tail += 1
+        if dq_min[min_head] <= i - w:
+            min_head += 1
+        if i >= w - 1:
+            hi[i] = x[dq_max[max_head]]
+            lo[i] = x[dq_min[min_head]]
+    return hi, lo
+
+hi, lo = rolling_minmax(df['Price'].to_numpy(), lookback)
+df['High_N'] = hi
+df['Low_N'] = lo
+
+# Signal: breakout above high = long, below low = short.
+# One nested np.where over raw arrays instead of two .loc mask writes.
+price = df['Price'].to_numpy()
+prev_hi = df['High_N'].shift(1).to_numpy()
+prev_lo = df['Low_N'].shift(1).to_numpy()
+df['Breakout_Signal'] = np.where(price >= prev_hi, 1,
+                        np.where(price <= prev_lo, -1, 0)).astype(np.int8)
+
+# Hold the position: carry the last non-zero signal forward
+df['Breakout_Signal'] = hold_signal(df['Breakout_Signal'].to_numpy(np.int8))
+df['Breakout_Position'], df['Breakout_Return'] = signal_to_returns(
+    df['Breakout_Signal'].to_numpy(np.int8), df['Return'].to_numpy())
 
 # Plot
 fig, ax = plt.subplots(figsize=(14, 5))
@@ -717,19 +967,22 @@ Trade based on recent performance:
         create_code_cell("""# Momentum Strategy
 momentum_period = 20
 
-df['Momentum'] = df['Price'].pct_change(momentum_period)
-df['Mom_Signal'] = np.where(df['Momentum'] > 0, 1, -1)
-df['Mom_Position'] = df['Mom_Signal'].shift(1)
-df['Mom_Return'] = df['Mom_Position'] * df['Return']
+# N-day return via a single strided divide: p[t] / p[t-N] - 1.
+# Equivalent to pct_change(momentum_period) without the shifted copy.
+p = df['Price'].to_numpy()
+df['Momentum'] = np.concatenate([np.full(momentum_period, np.nan),
+                                 p[momentum_period:] / p[:-momentum_period] - 1])
+df['Mom_Signal'] = np.where(df['Momentum'] > 0, 1, -1).astype(np.int8)
+df['Mom_Position'], df['Mom_Return'] = signal_to_returns(
+    df['Mom_Signal'].to_numpy(np.int8), df['Return'].to_numpy())
 
 # Compare all strategies
 df_compare = df.dropna()
 
 strategies = {
-    'Buy & Hold': (1 + df_compare['Return']).cumprod(),
-    'MA Crossover': (1 + df_compare['MA_Return']).cumprod(),
-    'Breakout': (1 + df_compare['Breakout_Return']).cumprod(),
-    'Momentum': (1 + df_compare['Mom_Return']).cumprod()
+    name: pd.Series(cum_wealth(df_compare[col].to_numpy()), df_compare.index)
+    for name, col in [('Buy & Hold', 'Return'), ('MA Crossover', 'MA_Return'),
+                      ('Breakout', 'Breakout_Return'), ('Momentum', 'Mom_Return')]
 }
 
 plt.figure(figsize=(14, 6))
@@ -740,6 +993,49 @@ plt.title('Trend Following Strategy Comparison')
 plt.legend()
 plt.show()"""),
 
+        create_markdown_cell("""### Aside: scaling to many signal variants
+
+At lesson scale (500 days) everything above is instant. On long series
+(100k+ days) independent signal variants are embarrassingly parallel:
+each one is a column of a signal matrix that a separate core can fill."""),
+
+        create_code_cell("""# Parallel MA-crossover variants: one prange iteration per (fast, slow)
+# pair, each filling its own int8 column with a running-sum MA loop.
+try:
+    from numba import prange
+except ImportError:
+    prange = range
+
+@njit(parallel=True, cache=True)
+def ma_signal_matrix(price, fasts, slows):
+    n = len(price)
+    k = len(fasts)
+    sigs = np.zeros((n, k), dtype=np.int8)
+    for j in prange(k):
+        f = fasts[j]
+        w = slows[j]
+        fast_sum = 0.0
+        slow_sum = 0.0
+        for i in range(n):
+            fast_sum += price[i]
+            slow_sum += price[i]
+            if i >= f:
+                fast_sum -= price[i - f]
+            if i >= w:
+                slow_sum -= price[i - w]
+            if i >= w - 1:  # both windows full
+                sigs[i, j] = 1 if fast_sum / f > slow_sum / w else -1
+    return sigs
+
+fasts = np.array([10, 20, 20, 50])
+slows = np.array([50, 100, 200, 200])
+sig_matrix = ma_signal_matrix(df['Price'].to_numpy(), fasts, slows)
+
+variants = pd.DataFrame(sig_matrix, index=df.index,
+                        columns=[f'MA {f}/{s}' for f, s in zip(fasts, slows)])
+print(f"{sig_matrix.shape[1]} signal variants in one parallel pass:")
+print(variants.tail())"""),
+
         create_markdown_cell("""## Exercise: Build a Combined Trend Signal
 
 Create a strategy that combines multiple trend signals:
@@ -762,23 +1058,26 @@ df['Combined_Return'] = None
 
         create_code_cell("""#@title 💡 Solution
 
-# Sum signals: only trade when all 3 agree
-signal_sum = df['MA_Signal'] + df['Breakout_Signal'].fillna(0) + df['Mom_Signal']
-
-df['Combined_Signal'] = 0
-df.loc[signal_sum == 3, 'Combined_Signal'] = 1   # All bullish
-df.loc[signal_sum == -3, 'Combined_Signal'] = -1  # All bearish
-# Otherwise stay flat (0)
+# Stack the signals as columns of one int8 matrix and reduce across it:
+# unanimity is just the row sum hitting +/-N. Adding a fourth strategy
+# later is one more column, not another pandas pass.
+S = np.column_stack([df['MA_Signal'], df['Breakout_Signal'].fillna(0),
+                     df['Mom_Signal']]).astype(np.int8)
+agg = S.sum(axis=1)
+df['Combined_Signal'] = np.where(agg == S.shape[1], 1,
+                        np.where(agg == -S.shape[1], -1, 0)).astype(np.int8)
+# Anything short of full agreement stays flat (0)
 
-df['Combined_Position'] = df['Combined_Signal'].shift(1)
-df['Combined_Return'] = df['Combined_Position'] * df['Return']
+df['Combined_Position'], df['Combined_Return'] = signal_to_returns(
+    df['Combined_Signal'].to_numpy(np.int8), df['Return'].to_numpy())
 
 # Plot
 df_final = df.dropna()
 plt.figure(figsize=(14, 6))
-plt.plot((1 + df_final['Return']).cumprod(), label='Buy & Hold', alpha=0.7)
-plt.plot((1 + df_final['MA_Return']).cumprod(), label='MA Crossover', alpha=0.7)
-plt.plot((1 + df_final['Combined_Return']).cumprod(), label='Combined Signal', linewidth=2)
+idx = df_final.index
+plt.plot(pd.Series(cum_wealth(df_final['Return'].to_numpy()), idx), label='Buy & Hold', alpha=0.7)
+plt.plot(pd.Series(cum_wealth(df_final['MA_Return'].to_numpy()), idx), label='MA Crossover', alpha=0.7)
+plt.plot(pd.Series(cum_wealth(df_final['Combined_Return'].to_numpy()), idx), label='Combined Signal', linewidth=2)
 plt.ylabel('Cumulative Return')
 plt.title('Combined Trend Signal Performance')
 plt.legend()
@@ -786,11 +1085,19 @@ plt.show()
 
 # Stats
 print("Combined Strategy Stats:")
-combined_rets = df_final['Combined_Return']
-print(f"Annual Return: {combined_rets.mean() * 252 * 100:.1f}%")
-print(f"Annual Vol: {combined_rets.std() * np.sqrt(252) * 100:.1f}%")
-print(f"Sharpe: {combined_rets.mean() / combined_rets.std() * np.sqrt(252):.2f}")
-print(f"Time in Market: {(df_final['Combined_Signal'] != 0).mean() * 100:.0f}%")""", hidden=True),
+# One pass over the returns: mean and std both derive from the sum and
+# sum of squares, so the column is scanned once instead of twice.
+a = df_final['Combined_Return'].to_numpy()
+n = a.size
+s = a.sum()
+s2 = (a * a).sum()
+mu = s / n
+sd = np.sqrt((s2 - s * s / n) / (n - 1))  # sample std, matches Series.std()
+ann = np.sqrt(252)
+print(f"Annual Return: {mu * 252 * 100:.1f}%")
+print(f"Annual Vol: {sd * ann * 100:.1f}%")
+print(f"Sharpe: {mu / sd * ann:.2f}")
+print(f"Time in Market: {100.0 * np.count_nonzero(df_final['Combined_Signal'].to_numpy()) / len(df_final):.0f}%")""", hidden=True),
 
         create_markdown_cell("""## Summary
 
@@ -808,7 +1115,12 @@ print(f"Time in Market: {(df_final['Combined_Signal'] != 0).mean() * 100:.0f}%")
     return create_notebook(cells, "Trend Following Strategies")
 
 
-def create_strategies_mean_reversion_notebook() -> Dict[str, Any]:
+@functools.lru_cache(maxsize=None)
+def create_strategies_mean_reversion_notebook(n_days: int = 500,
+                                              seed: int = 42,
+                                              window: int = 20,
+                                              z_entry: float = 1.5,
+                                              z_exit: float = 0.0) -> dict:
     """Strategies Module: Mean Reversion"""
     cells = [
         create_markdown_cell("""# Mean Reversion Strategies
@@ -819,24 +1131,99 @@ def create_strategies_mean_reversion_notebook() -> Dict[str, Any]:
 
 Learn to build strategies that profit when prices return to their mean - the opposite of trend following."""),
 
+        create_code_cell(f"""# Parameters (override with papermill, e.g. `-p n_days 10000`)
+n_days = {n_days}
+seed = {seed}
+window = {window}      # rolling window for the mean/std estimates
+z_entry = {z_entry}  # enter when |z| exceeds this
+z_exit = {z_exit}   # exit when z crosses back through this""", params=True),
+
         create_code_cell("""#@title 📦 Setup
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy import stats
 
-np.random.seed(42)
+# numba is optional (pre-installed on Colab): with it, the indicator
+# kernels below are JIT-compiled; without it they run as plain Python.
+try:
+    from numba import njit
+except ImportError:
+    def njit(**kwargs):
+        return lambda func: func
+
+@njit(cache=True)
+def hold_signal(sig):
+    \"\"\"Carry the last non-zero signal forward (hold the position).
+
+    Single pass over an int8 array; replaces the
+    replace(0, nan).ffill().fillna(0) pandas chain.
+    \"\"\"
+    out = np.empty_like(sig)
+    state = np.int8(0)
+    for i in range(len(sig)):
+        if sig[i] != 0:
+            state = sig[i]
+        out[i] = state
+    return out
+
+@njit(cache=True)
+def signal_to_returns(sig, ret):
+    \"\"\"Fuse hold-fill, the one-bar execution delay, and P&L into one pass.
+
+    Today's position is the last non-zero signal seen through yesterday
+    (no look-ahead), so the shift(1) and multiply intermediates are
+    never materialized.
+    \"\"\"
+    n = len(sig)
+    pos = np.empty(n)
+    out = np.empty(n)
+    state = 0.0
+    for i in range(n):
+        pos[i] = state
+        out[i] = state * ret[i]
+        if sig[i] != 0:
+            state = sig[i]
+    return pos, out
+
+@njit(cache=True)
+def cum_wealth(r):
+    \"\"\"Growth of $1: fused (1 + r) cumprod, no intermediate array.\"\"\"
+    n = len(r)
+    out = np.empty(n)
+    acc = 1.0
+    for i in range(n):
+        acc *= 1.0 + r[i]
+        out[i] = acc
+    return out
+
+# Warm the JIT cache on tiny inputs so the first strategy cell does not
+# pay the compile cost; with cache=True later sessions reload from disk.
+_tiny_sig = np.zeros(2, dtype=np.int8)
+_tiny_ret = np.zeros(2)
+hold_signal(_tiny_sig)
+signal_to_returns(_tiny_sig, _tiny_ret)
+cum_wealth(_tiny_ret)
+
+np.random.seed(seed)
 plt.style.use('seaborn-v0_8-whitegrid')
 
-# Generate mean-reverting price data (Ornstein-Uhlenbeck process)
-def generate_mean_reverting_data(n_days=500, mean=100, theta=0.1, sigma=2):
-    prices = [mean]
-    for _ in range(n_days - 1):
-        dp = theta * (mean - prices[-1]) + sigma * np.random.randn()
-        prices.append(prices[-1] + dp)
+# Generate mean-reverting price data (Ornstein-Uhlenbeck process).
+# The OU recurrence is inherently sequential, so it runs as a JIT'd
+# loop over pre-drawn noise instead of appending to a Python list.
+@njit(cache=True)
+def _ou_path(n_days, mean, theta, sigma, noise):
+    prices = np.empty(n_days)
+    prices[0] = mean
+    for i in range(1, n_days):
+        prices[i] = prices[i - 1] + theta * (mean - prices[i - 1]) + sigma * noise[i]
+    return prices
+
+def generate_mean_reverting_data(n_days, mean=100, theta=0.1, sigma=2):
+    noise = np.random.randn(n_days)
+    prices = _ou_path(n_days, mean, theta, sigma, noise)
 
     dates = pd.date_range('2022-01-01', periods=n_days, freq='B')
-    prices = np.array(prices)
     returns = np.diff(prices) / prices[:-1]
 
     return pd.DataFrame({
@@ -844,7 +1231,7 @@ def generate_mean_reverting_data(n_days=500, mean=100, theta=0.1, sigma=2):
         'Return': [np.nan] + list(returns)
     }, index=dates)
 
-df = generate_mean_reverting_data()
+df = generate_mean_reverting_data(n_days)
 print("✓ Setup complete!")""", hidden=True),
 
         create_markdown_cell("""## 1. Bollinger Bands
@@ -854,29 +1241,55 @@ Trade when price deviates significantly from its moving average:
 - **Lower Band** = MA - 2σ
 - **Signal**: Buy at lower band, sell at upper band"""),
 
-        create_code_cell("""# Bollinger Bands Strategy
-window = 20
+        create_code_cell("""# Bollinger Bands Strategy (window comes from the parameters cell)
 num_std = 2
 
-df['MA'] = df['Price'].rolling(window).mean()
-df['Std'] = df['Price'].rolling(window).std()
-df['Upper'] = df['MA'] + num_std * df['Std']
-df['Lower'] = df['MA'] - num_std * df['Std']
+@njit(cache=True)
+def rolling_mean_std(prices, window):
+    \"\"\"Rolling mean and sample std in one pass over the prices.
+
+    Maintains a running sum and sum of squares instead of re-scanning
+    each window, so both statistics cost a single sweep of the array.
+    \"\"\"
+    n = len(prices)
+    ma = np.full(n, np.nan)
+    sd = np.full(n, np.nan)
+    s = 0.0
+    s2 = 0.0
+    for i in range(n):
+        p = prices[i]
+        s += p
+        s2 += p * p
+        if i >= window:
+            old = prices[i - window]
+            s -= old
+            s2 -= old * old
+        if i >= window - 1:
+            ma[i] = s / window
+            var = (s2 - s * s / window) / (window - 1)
+            sd[i] = np.sqrt(var) if var > 0 else 0.0
+    return ma, sd
+
+ma, sd = rolling_mean_std(df['Price'].to_numpy(), window)
+df['MA'] = ma
+df['Std'] = sd
+df['Upper'] = ma + num_std * sd
+df['Lower'] = ma - num_std * sd
 
 # Z-score: how many std devs from mean
 df['Z_Score'] = (df['Price'] - df['MA']) / df['Std']
 
 # Signal: buy when below -2, sell when above +2
-df['BB_Signal'] = 0
-df.loc[df['Z_Score'] < -num_std, 'BB_Signal'] = 1   # Oversold -> buy
-df.loc[df['Z_Score'] > num_std, 'BB_Signal'] = -1   # Overbought -> sell
+z = df['Z_Score'].to_numpy()
+df['BB_Signal'] = np.where(z < -num_std, 1,      # oversold -> buy
+                  np.where(z > num_std, -1, 0)).astype(np.int8)  # overbought -> sell
 
 # Hold position until opposite signal
-df['BB_Signal'] = df['BB_Signal'].replace(0, np.nan).ffill().fillna(0)
+df['BB_Signal'] = hold_signal(df['BB_Signal'].to_numpy(np.int8))
 
 # Calculate returns
-df['BB_Position'] = df['BB_Signal'].shift(1)
-df['BB_Return'] = df['BB_Position'] * df['Return']
+df['BB_Position'], df['BB_Return'] = signal_to_returns(
+    df['BB_Signal'].to_numpy(np.int8), df['Return'].to_numpy())
 
 # Visualize
 fig, axes = plt.subplots(2, 1, figsize=(14, 8), sharex=True)
@@ -909,28 +1322,49 @@ Where RS = Average Gain / Average Loss over N periods
 - **RSI < 30**: Oversold → Buy signal"""),
 
         create_code_cell("""# RSI Strategy
-def calculate_rsi(prices, period=14):
-    delta = prices.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = (-delta).where(delta < 0, 0)
-
-    avg_gain = gain.rolling(period).mean()
-    avg_loss = loss.rolling(period).mean()
+@njit(cache=True)
+def rsi_numba(prices, period):
+    \"\"\"RSI via Wilder's recursive smoothing, one pass over the prices.\"\"\"
+    n = len(prices)
+    out = np.full(n, np.nan)
+    avg_gain = 0.0
+    avg_loss = 0.0
+    # Seed with the simple average of the first `period` moves
+    for i in range(1, period + 1):
+        delta = prices[i] - prices[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+    for i in range(period, n):
+        if i > period:
+            # Wilder smoothing: avg = (avg*(n-1) + move) / n
+            delta = prices[i] - prices[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss == 0.0:
+            out[i] = 100.0
+        else:
+            out[i] = 100 - 100 / (1 + avg_gain / avg_loss)
+    return out
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+def calculate_rsi(prices, period=14):
+    return pd.Series(rsi_numba(prices.to_numpy(), period), index=prices.index)
 
 df['RSI'] = calculate_rsi(df['Price'], period=14)
 
 # Signal: buy when oversold, sell when overbought
-df['RSI_Signal'] = 0
-df.loc[df['RSI'] < 30, 'RSI_Signal'] = 1   # Oversold -> buy
-df.loc[df['RSI'] > 70, 'RSI_Signal'] = -1  # Overbought -> sell
-df['RSI_Signal'] = df['RSI_Signal'].replace(0, np.nan).ffill().fillna(0)
+rsi = df['RSI'].to_numpy()
+df['RSI_Signal'] = np.where(rsi < 30, 1,      # oversold -> buy
+                   np.where(rsi > 70, -1, 0)).astype(np.int8) # overbought -> sell
+df['RSI_Signal'] = hold_signal(df['RSI_Signal'].to_numpy(np.int8))
 
-df['RSI_Position'] = df['RSI_Signal'].shift(1)
-df['RSI_Return'] = df['RSI_Position'] * df['Return']
+df['RSI_Position'], df['RSI_Return'] = signal_to_returns(
+    df['RSI_Signal'].to_numpy(np.int8), df['Return'].to_numpy())
 
 # Plot RSI
 fig, axes = plt.subplots(2, 1, figsize=(14, 6), sharex=True)
@@ -958,9 +1392,9 @@ df_clean = df.dropna()
 fig, ax = plt.subplots(figsize=(14, 6))
 
 strategies = {
-    'Buy & Hold': (1 + df_clean['Return']).cumprod(),
-    'Bollinger Bands': (1 + df_clean['BB_Return']).cumprod(),
-    'RSI': (1 + df_clean['RSI_Return']).cumprod()
+    name: pd.Series(cum_wealth(df_clean[col].to_numpy()), df_clean.index)
+    for name, col in [('Buy & Hold', 'Return'), ('Bollinger Bands', 'BB_Return'),
+                      ('RSI', 'RSI_Return')]
 }
 
 for name, cum_ret in strategies.items():
@@ -974,12 +1408,19 @@ plt.show()
 # Print stats
 print("\\nPerformance Metrics:")
 print("-" * 50)
+ann = np.sqrt(252)
 for name, strategy in [('Bollinger', 'BB_Return'), ('RSI', 'RSI_Return')]:
-    rets = df_clean[strategy]
+    # mean and std from one scan (sum and sum of squares)
+    a = df_clean[strategy].to_numpy()
+    n = a.size
+    s = a.sum()
+    s2 = (a * a).sum()
+    mu = s / n
+    sd = np.sqrt((s2 - s * s / n) / (n - 1))  # sample std, matches Series.std()
     print(f"\\n{name}:")
-    print(f"  Annual Return: {rets.mean() * 252 * 100:.1f}%")
-    print(f"  Annual Vol: {rets.std() * np.sqrt(252) * 100:.1f}%")
-    print(f"  Sharpe: {rets.mean() / rets.std() * np.sqrt(252):.2f}")"""),
+    print(f"  Annual Return: {mu * 252 * 100:.1f}%")
+    print(f"  Annual Vol: {sd * ann * 100:.1f}%")
+    print(f"  Sharpe: {mu / sd * ann:.2f}")"""),
 
         create_markdown_cell("""## Exercise: Z-Score Mean Reversion
 
@@ -1001,53 +1442,102 @@ df['ZS_Signal'] = 0  # Your code
 df['ZS_Position'] = None
 df['ZS_Return'] = None"""),
 
-        create_code_cell("""#@title 💡 Solution
-
-# Calculate z-score
-z_score = (df['Price'] - df['Price'].rolling(20).mean()) / df['Price'].rolling(20).std()
+        create_code_cell("""#@title 🔧 Helper: z-score position engine (run before the solution)
+# The z-score entry/exit rule is a tiny state machine. Two equivalent
+# engines: a vectorized event-index version, and a JIT'd scalar loop
+# that wins on very long series because the state stays in a register.
+
+def _zscore_positions_np(z, entry, exit0):
+    # A long runs from a z < -entry bar until the first z > exit0 bar,
+    # a short from z > entry until the first z < exit0 bar, so the
+    # position depends only on which event happened most recently.
+    idx = np.arange(z.size)
+
+    def last_seen(event):
+        return np.maximum.accumulate(np.where(event, idx, -1))
+
+    lo = z < -entry   # long entries
+    hi = z > entry    # short entries
+    up = z > exit0    # long exits
+    dn = z < exit0    # short exits
+
+    long_active = last_seen(lo) > last_seen(up)
+    short_active = last_seen(hi) > last_seen(dn)
+    return long_active.astype(np.int8) - short_active.astype(np.int8)
+
+@njit(cache=True)
+def _zscore_positions_jit(z, entry, exit0):
+    out = np.zeros(len(z), np.int8)
+    pos = np.int8(0)
+    for i in range(len(z)):
+        zi = z[i]
+        if zi < -entry:
+            pos = 1   # enter long (reverses an open short)
+        elif zi > entry:
+            pos = -1  # enter short (reverses an open long)
+        elif pos == 1 and zi > exit0:
+            pos = 0   # exit long
+        elif pos == -1 and zi < exit0:
+            pos = 0   # exit short
+        out[i] = pos
+    return out
+
+try:
+    import numba  # noqa: F401
+    zscore_positions = _zscore_positions_jit
+    zscore_positions(np.zeros(2), z_entry, z_exit)  # warm the JIT cache
+except ImportError:
+    zscore_positions = _zscore_positions_np""", hidden=True),
 
-# Entry and exit logic
-position = 0
-positions = []
-
-for z in z_score:
-    if np.isnan(z):
-        positions.append(0)
-        continue
-
-    # Entry signals
-    if z < -1.5 and position == 0:
-        position = 1  # Enter long
-    elif z > 1.5 and position == 0:
-        position = -1  # Enter short
-
-    # Exit signals
-    elif position == 1 and z > 0:
-        position = 0  # Exit long
-    elif position == -1 and z < 0:
-        position = 0  # Exit short
-
-    positions.append(position)
+        create_code_cell("""#@title 💡 Solution
 
-df['ZS_Signal'] = positions
-df['ZS_Position'] = df['ZS_Signal'].shift(1)
-df['ZS_Return'] = df['ZS_Position'] * df['Return']
+# Calculate z-score, reusing the one-pass rolling kernel from the
+# Bollinger cell instead of two separate rolling(20) traversals
+price = df['Price'].to_numpy()
+mu, sd = rolling_mean_std(price, window)
+z_score = pd.Series((price - mu) / sd, index=df.index)
+
+# Entry and exit logic via the position engine from the helper cell
+# (JIT'd scalar loop when numba is available, event-index NumPy pass
+# otherwise; a band-to-band jump reverses the position in place)
+sig = zscore_positions(z_score.to_numpy(), z_entry, z_exit)
+df['ZS_Signal'] = sig
+
+# One-bar execution delay as a raw int8 shift: Series.shift(1) would
+# promote the column to float just to hold the leading NaN.
+pos = np.empty_like(sig)
+pos[0] = 0
+pos[1:] = sig[:-1]
+df['ZS_Position'] = pos
+df['ZS_Return'] = pos * df['Return'].to_numpy()
+
+# Plot. dropna() would scan and copy every column; the comparison only
+# needs these four, so mask on them and project in one .loc call.
+mask = df['ZS_Return'].notna() & df['BB_Return'].notna()
+df_zs = df.loc[mask, ['Return', 'BB_Return', 'ZS_Return', 'ZS_Signal']]
+# One cumulative pass over all three return columns, on the raw
+# ndarray: no intermediate Series or index alignment per curve.
+curves = np.cumprod(1.0 + df_zs[['Return', 'BB_Return', 'ZS_Return']].to_numpy(), axis=0)
 
-# Plot
-df_zs = df.dropna()
 plt.figure(figsize=(14, 5))
-plt.plot((1 + df_zs['Return']).cumprod(), label='Buy & Hold', alpha=0.7)
-plt.plot((1 + df_zs['BB_Return']).cumprod(), label='Bollinger', alpha=0.7)
-plt.plot((1 + df_zs['ZS_Return']).cumprod(), label='Z-Score (with exits)', linewidth=2)
+plt.plot(df_zs.index, curves[:, 0], label='Buy & Hold', alpha=0.7)
+plt.plot(df_zs.index, curves[:, 1], label='Bollinger', alpha=0.7)
+plt.plot(df_zs.index, curves[:, 2], label='Z-Score (with exits)', linewidth=2)
 plt.legend()
 plt.title('Z-Score Strategy with Entry/Exit Rules')
 plt.show()
 
 print("Z-Score Strategy Stats:")
-rets = df_zs['ZS_Return']
-print(f"Annual Return: {rets.mean() * 252 * 100:.1f}%")
-print(f"Sharpe: {rets.mean() / rets.std() * np.sqrt(252):.2f}")
-print(f"Time in Market: {(df_zs['ZS_Signal'] != 0).mean() * 100:.0f}%")""", hidden=True),
+# mean and std from one scan (sum and sum of squares)
+a = df_zs['ZS_Return'].to_numpy()
+n = a.size
+s = a.sum()
+s2 = (a * a).sum()
+mu = s / n
+sd = np.sqrt((s2 - s * s / n) / (n - 1))  # sample std, matches Series.std()
+print(f"Annual Return: {mu * 252 * 100:.1f}%")
+print(f"Sharpe: {mu / sd * np.sqrt(252):.2f}")
+print(f"Time in Market: {100.0 * np.count_nonzero(df_zs['ZS_Signal'].to_numpy()) / len(df_zs):.0f}%")""", hidden=True),
 
         create_markdown_cell("""## Summary
 
@@ -1083,8 +1573,105 @@ NOTEBOOKS = {
 }
 
 
+# Everything before the cells array is identical for every notebook, so
+# serialize it exactly once at import time: the format version and
+# metadata dump with its closing brace swapped for the opening of the
+# cells array.
+_NB_HEADER = _dumps({
+    "nbformat": NBFORMAT_VERSION,
+    "nbformat_minor": NBFORMAT_MINOR,
+    "metadata": _NB_METADATA,
+})[:-1] + b',"cells":['
+
+
+def _notebook_fragments(notebook: dict) -> list[bytes]:
+    """Serialized fragments of a notebook: header, cells, closer.
+
+    The precomputed header prefix is followed by the cells array. The
+    fragments are returned as a list (scatter-gather style) so the
+    writer can hand them straight to the kernel without ever joining
+    them into one notebook-sized buffer.
+    """
+    parts = [_NB_HEADER]
+    for i, cell in enumerate(notebook["cells"]):
+        if i:
+            parts.append(b',')
+        parts.append(_cell_fragment(cell))
+    parts.append(b']}')
+    return parts
+
+
+def generate_one(task):
+    """Build and write a single notebook.
+
+    Top-level (not nested in main) so it pickles cleanly for the
+    process pool.
+    """
+    generator_func, output_path, emit_msgpack = task
+    notebook = generator_func()
+
+    if emit_msgpack:
+        # ~20% smaller than JSON and faster for non-Jupyter consumers to
+        # parse; written alongside the .ipynb, never instead of it.
+        packed = msgpack.packb(notebook, use_bin_type=True, default=asdict)
+        with open(f"{output_path}.msgpack", 'wb') as f:
+            f.write(packed)
+
+    parts = _notebook_fragments(notebook)
+    # Write to a sibling tempfile and rename over the target: truncating
+    # the .ipynb in place would let a concurrent reader (the --validate
+    # pass, a dev server watching notebooks/) see a torn file, while
+    # os.replace is atomic on the same filesystem.
+    tmp_path = f"{output_path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if hasattr(os, 'writev'):
+            # Scatter-gather write: the kernel walks the fragment list,
+            # so the notebook is never assembled in one userspace
+            # buffer. Regular files take the full iovec in one call;
+            # advance through the list if a write ever comes up short.
+            while parts:
+                written = os.writev(fd, parts)
+                while parts and written >= len(parts[0]):
+                    written -= len(parts.pop(0))
+                if parts and written:
+                    parts[0] = parts[0][written:]
+        else:
+            os.write(fd, b''.join(parts))
+        if hasattr(os, 'posix_fadvise'):
+            # Generated artifacts won't be re-read by this process; don't
+            # let a large batch evict more useful pages.
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, output_path)
+
+    return output_path
+
+
 def main():
     """Generate all notebooks."""
+    parser = argparse.ArgumentParser(description="Generate Colab notebooks.")
+    parser.add_argument('--msgpack', action='store_true',
+                        help="also emit .ipynb.msgpack artifacts "
+                             "(requires the msgpack package)")
+    parser.add_argument('--validate', action='store_true',
+                        help="schema-validate generated notebooks "
+                             "(debug only; requires the nbformat package)")
+    args = parser.parse_args()
+
+    if args.validate:
+        # nbformat's JSON-schema walk costs hundreds of ms per notebook,
+        # so it stays out of the default path: the structures here are
+        # built deterministically from trusted templates.
+        try:
+            import nbformat
+        except ImportError:
+            parser.error("--validate requires the nbformat package")
+
+    if args.msgpack and msgpack is None:
+        parser.error("--msgpack requires the msgpack package")
+
     project_root = Path(__file__).parent.parent
     notebooks_dir = project_root / 'notebooks'
 
@@ -1093,20 +1680,27 @@ def main():
         module_dir = notebooks_dir / module
         module_dir.mkdir(parents=True, exist_ok=True)
 
-    # Generate notebooks
-    generated = []
-    for module, lessons in NOTEBOOKS.items():
-        for lesson_slug, generator_func in lessons.items():
-            notebook = generator_func()
-            output_path = notebooks_dir / module / f"{lesson_slug}.ipynb"
-
-            with open(output_path, 'w') as f:
-                json.dump(notebook, f, indent=2)
+    # Generate notebooks. Each one is independent, so fan the CPU-bound
+    # build/serialize work out across cores; chunksize amortizes the IPC
+    # cost for small notebooks.
+    tasks = [
+        (generator_func, notebooks_dir / module / f"{lesson_slug}.ipynb",
+         args.msgpack)
+        for module, lessons in NOTEBOOKS.items()
+        for lesson_slug, generator_func in lessons.items()
+    ]
 
-            generated.append(f"{module}/{lesson_slug}")
+    with ProcessPoolExecutor() as executor:
+        for output_path in executor.map(generate_one, tasks, chunksize=4):
             print(f"✓ Generated: {output_path}")
 
-    print(f"\n🎉 Generated {len(generated)} notebooks!")
+    if args.validate:
+        for _, output_path, _ in tasks:
+            nbformat.validate(nbformat.read(output_path,
+                                            as_version=NBFORMAT_VERSION))
+        print(f"\n✓ Validated {len(tasks)} notebooks")
+
+    print(f"\n🎉 Generated {len(tasks)} notebooks!")
     print("\nTo use in QuantLearn:")
     print("1. Push notebooks to GitHub")
     print("2. Update lesson frontmatter with colabUrl:")